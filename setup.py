@@ -16,6 +16,7 @@ def main():
         packages=setuptools.find_packages(),
         license='MIT',
         install_requires=["strawberry-graphql", "strawberry-graphql"],
+        extras_require={"brotli": ["brotli"]},
         classifiers=[
             "Development Status :: 5 - Production/Stable",
             "Intended Audience :: Developers",
@@ -11,6 +11,7 @@ from typing import (
 )
 if TYPE_CHECKING:
     from .handler import GraphQLHandler
+    from .capture import TrafficRecorder
 
 
 @dataclass
@@ -20,11 +21,13 @@ class GQLBaseResolver:
         "root_value_method",
         "json_encoder",
         "json_decoder",
+        "traffic_recorder",
     )
     context_method: Callable[..., Coroutine[Any, Any, Any]]
     root_value_method: Callable[..., Coroutine[Any, Any, Any]]
     json_encoder: Callable[[Dict], Union[str, bytes]]
     json_decoder: Callable[[Union[str, bytes]], Dict]
+    traffic_recorder: Optional["TrafficRecorder"]
 
     async def get(self, inst: "GraphQLHandler", *args: Any, **kwargs: Any) -> None:
         return None
@@ -6,6 +6,7 @@ from http.client import (
     GONE
 )
 import json
+import time
 from typing import (
     TYPE_CHECKING,
     Any,
@@ -17,6 +18,7 @@ from typing import (
     cast,
     final,
 )
+from tornado.web import GZipContentEncoding
 from strawberry.exceptions import MissingQueryError
 from strawberry.http import (
     parse_request_data,
@@ -33,6 +35,7 @@ from strawberry.types.graphql import OperationType
 from ._base_resolver import GQLBaseResolver
 if TYPE_CHECKING:
     from .handler import GraphQLHandler
+    from .capture import TrafficRecorder
 
 
 __all__ = (
@@ -75,7 +78,7 @@ class GQLHttpResolver(GQLBaseResolver):
                 set()
             )
             response = await self.__execute(inst, request_data, allowed_operation_types)
-            await inst.finish(response)
+            return await _finish_response(inst, response)
 
         inst.set_status(NOT_FOUND)
         return await inst.finish()
@@ -94,9 +97,12 @@ class GQLHttpResolver(GQLBaseResolver):
             inst.set_status(BAD_REQUEST, "No valid query was provided for the request.")
             return await inst.finish()
         response = await self.__execute(inst, request_data)
-        await inst.finish(response)
+        await _finish_response(inst, response)
 
     async def __execute(self, inst: "GraphQLHandler", request_data: "GraphQLRequestData", allowed_operation_types: Optional[Iterable[OperationType]] = None) -> Optional[Union[str, bytes]]:  # noqa: E501
+        recorder = self.traffic_recorder
+        sampled = recorder is not None and recorder.should_sample()
+        started, clock = time.time(), time.perf_counter()
         context, root = await asyncio.gather(
             self.context_method(),
             self.root_value_method()
@@ -123,9 +129,43 @@ class GQLHttpResolver(GQLBaseResolver):
             inst.set_status(GONE, "Query canceled when it's still pending.")
             return None
 
-        return self.json_encoder(
+        response = self.json_encoder(
             cast(dict, process_result(result))
         )
+        if sampled:
+            cast("TrafficRecorder", recorder).record(
+                transport="http",
+                query=request_data.query,
+                operation_name=request_data.operation_name,
+                variables=request_data.variables,
+                started=started,
+                duration=time.perf_counter() - clock,
+                response_size=len(response.encode() if isinstance(response, str) else response),
+            )
+        return response
+
+
+async def _finish_response(inst: "GraphQLHandler", response: Optional[Union[str, bytes]]) -> None:
+    compression = inst.http_compression
+    if response is None or compression is None:
+        return await inst.finish(response)
+    data = response.encode() if isinstance(response, str) else response
+    _vary_accept_encoding(inst)
+    if len(data) >= compression.min_size:
+        encoding = compression.select_encoding(inst.request.headers.get("Accept-Encoding", ""))
+        if encoding is not None:
+            data = compression.compress(data, encoding)
+            inst.set_header("Content-Encoding", encoding)
+    return await inst.finish(data)
+
+
+def _vary_accept_encoding(inst: "GraphQLHandler") -> None:
+    # With compress_response (or a GZipContentEncoding transform) Tornado adds the header itself.
+    if any(isinstance(t, type) and issubclass(t, GZipContentEncoding) for t in inst.application.transforms):
+        return None
+    if any("accept-encoding" in v.lower() for v in inst._headers.get_list("Vary")):
+        return None
+    inst.add_header("Vary", "Accept-Encoding")
 
 
 def _decode_request_data(inst: "GraphQLHandler", json_decoder: Callable[[Union[str, bytes]], Dict]) -> Dict[str, Any]:
@@ -1,7 +1,9 @@
 from __future__ import annotations
 import asyncio
+from dataclasses import dataclass
 from datetime import timedelta
 from logging import warning
+import time
 from typing import (
     TYPE_CHECKING,
     Any,
@@ -13,6 +15,7 @@ from typing import (
     Type,
     TypedDict,
     Optional,
+    Union,
     cast,
     final,
 )
@@ -27,6 +30,7 @@ from ._ws_protocols.graphql_ws import GraphQLWSAdapter
 from ._base_resolver import GQLBaseResolver
 if TYPE_CHECKING:
     from .handler import GraphQLHandler
+    from .capture import TrafficRecorder
 
 
 class GqlProtocol(Protocol):
@@ -66,10 +70,32 @@ class AdapterParams(TypedDict, total=False):
     close: Callable[[int, Optional[str]], None]
 
 
+@dataclass
+class _CapturedOperation:
+    __slots__ = (
+        "payload",
+        "subprotocol",
+        "started",
+        "clock",
+        "response_size",
+    )
+    payload: Dict[str, Any]
+    subprotocol: str
+    started: float
+    clock: float
+    response_size: int
+
+
+CAPTURE_START_TYPES = ("subscribe", "start")
+CAPTURE_CLIENT_STOP_TYPES = ("complete", "stop")
+CAPTURE_SERVER_STOP_TYPES = ("complete", "error")
+
+
 class GQLWsResolver(GQLBaseResolver):
     """Resolve Web socket communication"""
-    __slots__ = ("__protocol",)
+    __slots__ = ("__protocol", "__captured")
     __protocol: GqlProtocol
+    __captured: Dict[str, _CapturedOperation]
 
     @final
     def select_subprotocol(self, subprotocols: list[str]) -> Optional[str]:
@@ -81,6 +107,7 @@ class GQLWsResolver(GQLBaseResolver):
 
     @final
     async def open(self, inst: "GraphQLHandler") -> None:
+        self.__captured = {}
         if inst.get_status() >= 400:
             return inst.close(4500, "Internal server error.")
 
@@ -97,6 +124,8 @@ class GQLWsResolver(GQLBaseResolver):
 
         async def write_msg(response: Mapping[str, Any]) -> None:
             data = self.json_encoder(cast(dict, response))
+            if self.__captured:
+                self.__capture_response(response, data)
             try:
                 await inst.write_message(data)
             except WebSocketClosedError:
@@ -119,9 +148,56 @@ class GQLWsResolver(GQLBaseResolver):
 
     @final
     def on_close(self, inst: "GraphQLHandler") -> None:
+        for operation_id in list(self.__captured):
+            self.__finish_capture(operation_id, "closed")
         asyncio.create_task(self.__protocol.cleanup())
 
     @final
     async def on_message(self, inst: "GraphQLHandler", message: str) -> None:
         parsed_message = self.json_decoder(message)
+        if self.traffic_recorder is not None:
+            self.__capture_message(inst, parsed_message)
         await self.__protocol.handle_message(parsed_message)
+
+    def __capture_message(self, inst: "GraphQLHandler", message: Dict[str, Any]) -> None:
+        operation_id = message.get("id")
+        if operation_id is None:
+            return None
+        message_type = message.get("type")
+        if message_type in CAPTURE_START_TYPES:
+            payload = message.get("payload")
+            if isinstance(payload, dict) and cast("TrafficRecorder", self.traffic_recorder).should_sample():
+                self.__captured[operation_id] = _CapturedOperation(
+                    payload=payload,
+                    subprotocol=cast(str, inst.selected_subprotocol),
+                    started=time.time(),
+                    clock=time.perf_counter(),
+                    response_size=0,
+                )
+        elif message_type in CAPTURE_CLIENT_STOP_TYPES:
+            self.__finish_capture(operation_id, "client")
+
+    def __capture_response(self, response: Mapping[str, Any], data: Union[str, bytes]) -> None:
+        operation_id = response.get("id")
+        captured = self.__captured.get(cast(str, operation_id))
+        if captured is None:
+            return None
+        captured.response_size += len(data.encode() if isinstance(data, str) else data)
+        if response.get("type") in CAPTURE_SERVER_STOP_TYPES:
+            self.__finish_capture(cast(str, operation_id), "server")
+
+    def __finish_capture(self, operation_id: str, ended: str) -> None:
+        captured = self.__captured.pop(operation_id, None)
+        if captured is None:
+            return None
+        cast("TrafficRecorder", self.traffic_recorder).record(
+            transport="ws",
+            query=captured.payload.get("query"),
+            operation_name=captured.payload.get("operationName"),
+            variables=captured.payload.get("variables"),
+            started=captured.started,
+            duration=time.perf_counter() - captured.clock,
+            response_size=captured.response_size,
+            subprotocol=captured.subprotocol,
+            ended=ended,
+        )
@@ -0,0 +1,285 @@
+from __future__ import annotations
+import atexit
+from contextlib import suppress
+import hashlib
+import json
+from logging import warning
+import os
+import queue
+import random
+import threading
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Union,
+)
+
+
+__all__ = (
+    "TrafficRecorder",
+    "CaptureRecord",
+    "redact_keys",
+    "read_capture",
+)
+
+REDACTED = "[REDACTED]"
+
+CaptureRecord = Dict[str, Any]
+RedactHook = Callable[[Optional[Dict[str, Any]]], Optional[Dict[str, Any]]]
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()[:16]
+
+
+def redact_keys(*names: str) -> RedactHook:
+    """Build a redaction hook which masks variables with the given names at any depth"""
+    lookup = frozenset(name.lower() for name in names)
+
+    def _redact(value: Any) -> Any:
+        if isinstance(value, dict):
+            return {
+                k: REDACTED if k.lower() in lookup else _redact(v)
+                for k, v in value.items()
+            }
+        elif isinstance(value, list):
+            return [_redact(v) for v in value]
+        return value
+
+    def hook(variables: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        return _redact(variables) if variables else variables
+
+    return hook
+
+
+class TrafficRecorder:
+    """
+    Sample GraphQL operations in to a rotating JSON lines file.
+
+    Every line holds the operation hash, name, variables, timing and response size.
+    The query text is written only on the first occurrence of its hash in a file,
+    so a single file is always self-contained for the replay.
+
+    Records are handed to a background thread which encodes and writes them,
+    the file is flushed when the queue is idle for `flush_interval` seconds
+    or when the recorder is closed. At most `max_queued` records wait for the
+    writer, further records are dropped. Failures are logged and never reach
+    the request which is recorded.
+    """
+    __slots__ = (
+        "path",
+        "sample_rate",
+        "max_bytes",
+        "backup_count",
+        "redact",
+        "flush_interval",
+        "_queue",
+        "_dropped",
+        "_failing",
+        "_thread",
+        "_lock",
+        "_stream",
+        "_size",
+        "_seen",
+    )
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        sample_rate: float = 1.0,
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5,
+        redact: Optional[RedactHook] = None,
+        flush_interval: float = 1.0,
+        max_queued: int = 10000,
+    ) -> None:
+        self.path = os.fspath(path)
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.redact = redact
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Optional[CaptureRecord]]" = queue.Queue(max_queued)
+        self._dropped = 0
+        self._failing = False
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stream: Optional[IO[str]] = None
+        self._size = 0
+        self._seen: Set[str] = set()
+
+    def should_sample(self) -> bool:
+        if self.sample_rate >= 1:
+            return True
+        return random.random() < self.sample_rate
+
+    def record(
+        self,
+        transport: str,
+        query: Optional[str],
+        operation_name: Optional[str],
+        variables: Optional[Dict[str, Any]],
+        started: float,
+        duration: float,
+        response_size: int,
+        subprotocol: Optional[str] = None,
+        ended: Optional[str] = None,
+    ) -> None:
+        # A capture failure, e.g. in the user redaction hook, must never break the served operation.
+        try:
+            if self.redact is not None:
+                variables = self.redact(variables)
+            record: CaptureRecord = {
+                "ts": round(started, 6),
+                "transport": transport,
+                "query": query or "",
+                "operation_name": operation_name,
+                "variables": variables,
+                "duration": round(duration, 6),
+                "response_size": response_size,
+            }
+            if subprotocol is not None:
+                record["subprotocol"] = subprotocol
+            if ended is not None:
+                record["ended"] = ended
+            with self._lock:
+                if self._thread is None:
+                    thread = threading.Thread(target=self._run, name="strawberry-tornado-capture", daemon=True)
+                    thread.start()
+                    self._thread = thread
+                    atexit.register(self.close)
+                try:
+                    self._queue.put_nowait(record)
+                except queue.Full:
+                    self._dropped += 1
+                    if self._dropped % 1000 == 1:
+                        warning(f"Traffic capture queue is full, {self._dropped} record(s) dropped")
+        except Exception as e:
+            warning(f"Traffic capture: unable to record operation {operation_name!r}: {e!r}")
+
+    def close(self) -> None:
+        """Write the queued records and close the file"""
+        with self._lock:
+            if self._thread is None:
+                return None
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        atexit.unregister(self.close)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                record = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._guarded(self._flush)
+                continue
+            if record is None:
+                self._guarded(self._close_stream)
+                return None
+            self._guarded(self._write, record)
+
+    def _guarded(self, method: Callable[..., None], *args: Any) -> None:
+        # Only the first failure is logged until a write succeeds again.
+        try:
+            method(*args)
+        except Exception as e:
+            if not self._failing:
+                warning(f"Traffic capture: unable to write {self.path}: {e!r}")
+            self._failing = True
+            self._discard_stream()
+        else:
+            self._failing = False
+
+    def _flush(self) -> None:
+        if self._stream is not None:
+            self._stream.flush()
+
+    def _write(self, record: CaptureRecord) -> None:
+        query = record.pop("query")
+        digest = record["hash"] = query_hash(query)
+        line = self._encode(record, digest, query)
+        stream = self._open()
+        if self.max_bytes > 0 and self._size and self._size + len(line) > self.max_bytes:
+            self._rollover()
+            line = self._encode(record, digest, query)
+            stream = self._open()
+        self._seen.add(digest)
+        stream.write(line)
+        self._size += len(line)
+
+    def _encode(self, record: CaptureRecord, digest: str, query: str) -> str:
+        if digest not in self._seen:
+            record = dict(record, query=query)
+        return json.dumps(record, separators=(",", ":"), default=str) + "\n"
+
+    def _open(self) -> IO[str]:
+        if self._stream is None:
+            self._stream = open(self.path, "a", encoding="utf-8")
+            self._size = self._stream.tell()
+        return self._stream
+
+    def _close_stream(self) -> None:
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def _discard_stream(self) -> None:
+        # Start over with a new file on the next record, whatever state the failure left.
+        stream, self._stream = self._stream, None
+        self._seen.clear()
+        if stream is not None:
+            with suppress(OSError):
+                stream.close()
+
+    def _rollover(self) -> None:
+        self._close_stream()
+        self._seen.clear()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                src, dst = f"{self.path}.{i}", f"{self.path}.{i + 1}"
+                if os.path.exists(src):
+                    os.replace(src, dst)
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._size = 0
+
+
+def capture_files(path: Union[str, os.PathLike]) -> List[str]:
+    """Capture file and its rotated backups ordered from the oldest to the newest"""
+    path = os.fspath(path)
+    backups = []
+    i = 1
+    while os.path.exists(f"{path}.{i}"):
+        backups.append(f"{path}.{i}")
+        i += 1
+    files = list(reversed(backups))
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def read_capture(paths: Union[str, os.PathLike, Iterable[Union[str, os.PathLike]]]) -> Iterator[CaptureRecord]:
+    """Read recorded operations, restoring the query text of every record"""
+    if isinstance(paths, (str, os.PathLike)):
+        paths = capture_files(paths)
+    queries: Dict[str, str] = {}
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if "query" in record:
+                    queries[record["hash"]] = record["query"]
+                else:
+                    record["query"] = queries.get(record["hash"])
+                yield record
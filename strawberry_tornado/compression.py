@@ -0,0 +1,139 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass
+import gzip
+import hashlib
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+from tornado import httputil
+from tornado.websocket import WebSocketProtocol13
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+__all__ = (
+    "WebSocketCompression",
+    "HTTPCompression",
+)
+
+
+@dataclass(frozen=True)
+class WebSocketCompression:
+    """permessage-deflate settings of the WebSocket connection"""
+    compression_level: int = 6
+    mem_level: int = 8
+    context_takeover: bool = True
+
+    def options(self) -> Dict[str, Any]:
+        return {
+            "compression_level": self.compression_level,
+            "mem_level": self.mem_level,
+        }
+
+
+class NoContextTakeoverProtocol(WebSocketProtocol13):
+    """
+    Agree on `server_no_context_takeover` whenever permessage-deflate is offered.
+
+    Tornado has no option for it, so the parameter is added to the parsed offer:
+    the server compressor drops its state between messages and the parameter is
+    echoed in the handshake response. Valueless parameters of the client offer
+    are dropped by Tornado's parser, the client side context is left as negotiated.
+
+    Overrides the private `WebSocketProtocol13._parse_extensions_header`,
+    verified with Tornado 6.2 to 6.5.
+    """
+
+    @staticmethod
+    def supported() -> bool:
+        return callable(getattr(WebSocketProtocol13, "_parse_extensions_header", None))
+
+    def _parse_extensions_header(self, headers: httputil.HTTPHeaders) -> List[Tuple[str, Dict[str, str]]]:
+        return [
+            (name, dict(params, server_no_context_takeover=None) if name == "permessage-deflate" else params)
+            for name, params in super()._parse_extensions_header(headers)
+        ]
+
+
+class HTTPCompression:
+    """
+    Compress HTTP results with brotli (when installed) or gzip.
+
+    Payloads smaller than `min_size` are sent as is. The application wide
+    `compress_response` setting still gzips them from Tornado's own 1024 bytes
+    threshold, leave it off to keep `min_size` effective. With `cache_max_bytes` above zero
+    the compressed bytes of identical payloads are kept in a LRU cache keyed by
+    the payload digest, holding at most `cache_max_bytes` of compressed data.
+    """
+    __slots__ = (
+        "min_size",
+        "gzip_level",
+        "brotli_quality",
+        "cache_max_bytes",
+        "_cache",
+        "_cache_bytes",
+    )
+
+    def __init__(
+        self,
+        min_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+        cache_max_bytes: int = 0,
+    ) -> None:
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache_max_bytes = cache_max_bytes
+        self._cache: OrderedDict[Tuple[str, bytes], bytes] = OrderedDict()
+        self._cache_bytes = 0
+
+    def select_encoding(self, accept_encoding: str) -> Optional[str]:
+        accepted = set()
+        for item in accept_encoding.split(","):
+            coding, _, params = item.partition(";")
+            coding = coding.strip().lower()
+            quality = params.strip()
+            if quality.startswith("q="):
+                try:
+                    if float(quality[2:]) <= 0:
+                        continue
+                except ValueError:
+                    continue
+            accepted.add(coding)
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def compress(self, data: bytes, encoding: str) -> bytes:
+        if self.cache_max_bytes <= 0:
+            return self._compress(data, encoding)
+        key = (encoding, hashlib.blake2b(data, digest_size=16).digest())
+        compressed = self._cache.get(key)
+        if compressed is not None:
+            self._cache.move_to_end(key)
+            return compressed
+        compressed = self._compress(data, encoding)
+        if len(compressed) <= self.cache_max_bytes:
+            self._cache[key] = compressed
+            self._cache_bytes += len(compressed)
+            while self._cache_bytes > self.cache_max_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= len(evicted)
+        return compressed
+
+    def _compress(self, data: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 from datetime import timedelta
 import json
+from logging import warning
 from typing import (
     Any,
     Callable,
@@ -22,6 +23,8 @@ from strawberry.subscriptions import (
 from ._base_resolver import GQLBaseResolver
 from ._http_resolver import GQLHttpResolver
 from ._ws_resolver import GQLWsResolver
+from .capture import TrafficRecorder
+from .compression import HTTPCompression, NoContextTakeoverProtocol, WebSocketCompression
 
 
 class RequestResolver(Protocol):
@@ -46,6 +49,9 @@ class GraphQLHandler(tornado.websocket.WebSocketHandler):
     ws_keep_alive_interval: float
     ws_subscription_protocols: Tuple[str, ...]
     ws_connection_init_wait_timeout: timedelta
+    traffic_recorder: Optional[TrafficRecorder]
+    ws_compression: Optional[WebSocketCompression]
+    http_compression: Optional[HTTPCompression]
 
     __slots__ = (
         "schema",
@@ -55,6 +61,9 @@ class GraphQLHandler(tornado.websocket.WebSocketHandler):
         "ws_keep_alive_interval",
         "ws_subscription_protocols",
         "ws_connection_init_wait_timeout",
+        "traffic_recorder",
+        "ws_compression",
+        "http_compression",
     )
 
     @final
@@ -67,6 +76,9 @@ class GraphQLHandler(tornado.websocket.WebSocketHandler):
         ws_keep_alive_interval: float = 1,
         ws_subscription_protocols: Tuple[str, ...] = (GRAPHQL_TRANSPORT_WS_PROTOCOL, GRAPHQL_WS_PROTOCOL,),
         ws_connection_init_wait_timeout: timedelta = timedelta(minutes=1),
+        traffic_recorder: Optional[TrafficRecorder] = None,
+        ws_compression: Optional[WebSocketCompression] = None,
+        http_compression: Optional[HTTPCompression] = None,
     ) -> None:
         self.schema = schema
         self.graphiql = graphiql
@@ -75,6 +87,9 @@ class GraphQLHandler(tornado.websocket.WebSocketHandler):
         self.ws_keep_alive_interval = ws_keep_alive_interval
         self.ws_subscription_protocols = ws_subscription_protocols
         self.ws_connection_init_wait_timeout = ws_connection_init_wait_timeout
+        self.traffic_recorder = traffic_recorder
+        self.ws_compression = ws_compression
+        self.http_compression = http_compression
 
     async def prepare(self) -> None:
         resolver_type = GQLWsResolver if self._is_ws else GQLHttpResolver
@@ -83,6 +98,7 @@ class GraphQLHandler(tornado.websocket.WebSocketHandler):
             root_value_method=self.get_root_value,
             json_encoder=self.json_encoder,
             json_decoder=self.json_decoder,
+            traffic_recorder=self.traffic_recorder,
         )
 
     @property
@@ -106,6 +122,27 @@ class GraphQLHandler(tornado.websocket.WebSocketHandler):
     def select_subprotocol(self, subprotocols: list[str]) -> Optional[str]:
         return self.__resolver.select_subprotocol(subprotocols)
 
+    def get_compression_options(self) -> Optional[Dict[str, Any]]:
+        if self.ws_compression is None:
+            return None
+        return self.ws_compression.options()
+
+    def get_websocket_protocol(self) -> Optional[tornado.websocket.WebSocketProtocol]:
+        protocol = super().get_websocket_protocol()
+        if protocol is None or self.ws_compression is None or self.ws_compression.context_takeover:
+            return protocol
+        if type(protocol) is tornado.websocket.WebSocketProtocol13 and NoContextTakeoverProtocol.supported():
+            # Constructing the subclass would need Tornado's private _WebSocketParams and a copy of
+            # the ping settings logic of each version. The subclass only overrides the extensions
+            # negotiation and adds no state, so the instance Tornado built is reused as is.
+            protocol.__class__ = NoContextTakeoverProtocol
+        else:
+            warning(
+                f"ws_compression context_takeover=False is not applied to {type(protocol).__name__}, "
+                "permessage-deflate is negotiated with context takeover."
+            )
+        return protocol
+
     @final
     async def open(self, *args: str, **kwargs: str) -> None:
         return await self.__resolver.open(self)
@@ -0,0 +1,285 @@
+from __future__ import annotations
+import argparse
+import asyncio
+from collections import defaultdict
+from contextlib import suppress
+from dataclasses import dataclass
+import importlib
+import json
+import statistics
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+)
+
+import tornado.web
+from tornado.httpclient import AsyncHTTPClient
+from tornado.httpserver import HTTPServer
+from tornado.netutil import bind_sockets
+from tornado.websocket import WebSocketClosedError, websocket_connect
+from strawberry.subscriptions import (
+    GRAPHQL_TRANSPORT_WS_PROTOCOL,
+    GRAPHQL_WS_PROTOCOL,
+)
+
+from .capture import CaptureRecord, read_capture
+
+
+__all__ = (
+    "ReplayResult",
+    "replay",
+)
+
+REPLAY_OPERATION_ID = "1"
+# (start, client stop) message types of every subprotocol
+WS_MESSAGE_TYPES = {
+    GRAPHQL_TRANSPORT_WS_PROTOCOL: ("subscribe", "complete"),
+    GRAPHQL_WS_PROTOCOL: ("start", "stop"),
+}
+
+
+@dataclass
+class ReplayResult:
+    __slots__ = (
+        "transport",
+        "operation_name",
+        "hash",
+        "started",
+        "recorded_duration",
+        "recorded_size",
+        "duration",
+        "response_size",
+        "error",
+    )
+    transport: str
+    operation_name: Optional[str]
+    hash: str
+    started: float
+    recorded_duration: float
+    recorded_size: int
+    duration: float
+    response_size: int
+    error: Optional[str]
+
+
+async def replay(
+    app: tornado.web.Application,
+    records: Iterable[CaptureRecord],
+    rate: float = 1.0,
+    path: str = "/graphql",
+    max_clients: int = 100,
+    timeout: float = 30.0,
+) -> List[ReplayResult]:
+    """
+    Serve the application on a local port and send the recorded operations to it.
+
+    Records are written when an operation ends, so they are sorted by their start
+    time first and the results follow that order. The original pacing is kept and
+    scaled by `rate` (2.0 is twice as fast), a `rate` of 0 fires every operation
+    without delays. Subscriptions which were stopped by the client are stopped
+    after the recorded (scaled) duration, and every operation is abandoned after
+    `timeout` seconds.
+    """
+    ordered = sorted((r for r in records if r.get("query") is not None), key=lambda r: r["ts"])
+    server = HTTPServer(app)
+    sockets = bind_sockets(0, "127.0.0.1")
+    port = sockets[0].getsockname()[1]
+    server.add_sockets(sockets)
+    client = AsyncHTTPClient(force_instance=True, max_clients=max_clients)
+    # The client queues requests above max_clients, wait here so the queue is not timed.
+    slots = asyncio.Semaphore(max_clients)
+    http_url = f"http://127.0.0.1:{port}{path}"
+    ws_url = f"ws://127.0.0.1:{port}{path}"
+    loop = asyncio.get_running_loop()
+    tasks: List[asyncio.Task] = []
+    try:
+        origin = ordered[0]["ts"] if ordered else 0.0
+        start = loop.time()
+        for record in ordered:
+            if rate > 0:
+                delay = (record["ts"] - origin) / rate - (loop.time() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            if record["transport"] == "ws":
+                coro = _replay_ws(ws_url, record, rate)
+            else:
+                coro = _replay_http(client, slots, http_url, record)
+            tasks.append(asyncio.create_task(_run(coro, record, loop.time() - start, timeout)))
+        return list(await asyncio.gather(*tasks))
+    finally:
+        for task in tasks:
+            task.cancel()
+        client.close()
+        server.stop()
+        await server.close_all_connections()
+
+
+async def _run(coro: Awaitable[ReplayResult], record: CaptureRecord, started: float, timeout: float) -> ReplayResult:
+    clock = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(coro, timeout)
+    except asyncio.TimeoutError:
+        result = _result(record, time.perf_counter() - clock, 0, "timeout")
+    except Exception as e:
+        result = _result(record, time.perf_counter() - clock, 0, f"{type(e).__name__}: {e}")
+    result.started = started
+    return result
+
+
+def _payload(record: CaptureRecord) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {"query": record["query"]}
+    if record.get("operation_name") is not None:
+        payload["operationName"] = record["operation_name"]
+    if record.get("variables") is not None:
+        payload["variables"] = record["variables"]
+    return payload
+
+
+def _result(record: CaptureRecord, duration: float, response_size: int, error: Optional[str]) -> ReplayResult:
+    return ReplayResult(
+        transport=record["transport"],
+        operation_name=record.get("operation_name"),
+        hash=record["hash"],
+        started=0.0,
+        recorded_duration=record["duration"],
+        recorded_size=record["response_size"],
+        duration=duration,
+        response_size=response_size,
+        error=error,
+    )
+
+
+async def _replay_http(client: AsyncHTTPClient, slots: asyncio.Semaphore, url: str, record: CaptureRecord) -> ReplayResult:
+    body = json.dumps(_payload(record))
+    async with slots:
+        clock = time.perf_counter()
+        response = await client.fetch(
+            url,
+            method="POST",
+            body=body,
+            headers={"Content-Type": "application/json"},
+            raise_error=False,
+        )
+    if response.code == 599:
+        return _result(record, time.perf_counter() - clock, 0, str(response.error))
+    error = None if response.code < 400 else f"HTTP {response.code}"
+    return _result(record, time.perf_counter() - clock, len(response.body or b""), error)
+
+
+async def _replay_ws(url: str, record: CaptureRecord, rate: float) -> ReplayResult:
+    subprotocol = record.get("subprotocol", GRAPHQL_TRANSPORT_WS_PROTOCOL)
+    start_type, stop_type = WS_MESSAGE_TYPES[subprotocol]
+    size = 0
+    error: Optional[str] = None
+    subscribed = completed = False
+    conn = await websocket_connect(url, subprotocols=[subprotocol])
+    try:
+        conn.write_message(json.dumps({"type": "connection_init"}))
+        while True:
+            message = await conn.read_message()
+            if message is None:
+                return _result(record, 0, 0, "connection_ack not received")
+            if json.loads(message).get("type") == "connection_ack":
+                break
+
+        # Operations stopped by the client (or by closing the socket) are live
+        # subscriptions, the server would never complete them on its own.
+        deadline: Optional[float] = None
+        if record.get("ended") in ("client", "closed"):
+            deadline = record["duration"] / rate if rate > 0 else record["duration"]
+        clock = time.perf_counter()
+        conn.write_message(json.dumps({"id": REPLAY_OPERATION_ID, "type": start_type, "payload": _payload(record)}))
+        subscribed = True
+        while True:
+            remaining = None if deadline is None else deadline - (time.perf_counter() - clock)
+            if remaining is not None and remaining <= 0:
+                break
+            try:
+                message = await asyncio.wait_for(conn.read_message(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if message is None:
+                error = "connection closed"
+                completed = True
+                break
+            parsed = json.loads(message)
+            if parsed.get("id") != REPLAY_OPERATION_ID:
+                continue
+            size += len(message.encode() if isinstance(message, str) else message)
+            if parsed.get("type") == "error":
+                error = "operation error"
+                completed = True
+                break
+            if parsed.get("type") == "complete":
+                completed = True
+                break
+        duration = time.perf_counter() - clock
+    finally:
+        if subscribed and not completed:
+            with suppress(WebSocketClosedError):
+                conn.write_message(json.dumps({"id": REPLAY_OPERATION_ID, "type": stop_type}))
+        conn.close()
+    return _result(record, duration, size, error)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def summarize(results: Iterable[ReplayResult]) -> str:
+    """
+    Per operation table of the replay.
+
+    `srv` columns come from the capture and are measured in the server: HTTP from
+    the start of the execution (context and root value included) to the encoded
+    result, WebSocket from the received subscribe message to the end of the operation.
+    `rtt` columns are measured by the replay client over loopback and also include
+    the HTTP/WebSocket round trip, the client queue is not included.
+    """
+    grouped: Dict[str, List[ReplayResult]] = defaultdict(list)
+    for result in results:
+        grouped[result.operation_name or result.hash].append(result)
+    lines = [f"{'operation':<32} {'count':>6} {'errors':>6} {'srv p50 ms':>11} {'rtt p50 ms':>11} {'rtt p95 ms':>11} {'rec bytes':>10} {'bytes':>10}"]
+    for name, items in sorted(grouped.items(), key=lambda kv: -len(kv[1])):
+        durations = [r.duration * 1000 for r in items]
+        lines.append(
+            f"{name[:32]:<32} {len(items):>6} {sum(1 for r in items if r.error):>6} "
+            f"{statistics.median(r.recorded_duration * 1000 for r in items):>11.2f} "
+            f"{statistics.median(durations):>11.2f} {_percentile(durations, 0.95):>11.2f} "
+            f"{int(statistics.mean(r.recorded_size for r in items)):>10} "
+            f"{int(statistics.mean(r.response_size for r in items)):>10}"
+        )
+    return "\n".join(lines)
+
+
+def _load_app(target: str) -> tornado.web.Application:
+    module_name, _, attr = target.partition(":")
+    obj = getattr(importlib.import_module(module_name), attr or "app")
+    return obj() if callable(obj) and not isinstance(obj, tornado.web.Application) else obj
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay captured GraphQL traffic against a local application")
+    parser.add_argument("capture", help="capture file written by TrafficRecorder, rotated backups are included")
+    parser.add_argument("app", help="'module:attr' of a tornado Application or a factory returning one")
+    parser.add_argument("--rate", type=float, default=1.0, help="pace multiplier, 0 disables delays (default: 1.0)")
+    parser.add_argument("--path", default="/graphql", help="GraphQLHandler route (default: /graphql)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per operation timeout in seconds (default: 30)")
+    args = parser.parse_args()
+
+    async def run() -> None:
+        app = _load_app(args.app)
+        results = await replay(app, read_capture(args.capture), rate=args.rate, path=args.path, timeout=args.timeout)
+        print(summarize(results))
+
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+import asyncio
+import hashlib
+from typing import AsyncGenerator
+
+import strawberry
+
+
+@strawberry.type
+class Query:
+    @strawberry.field
+    def hello(self, name: str, secret: str = "") -> str:
+        return f"Hello {name}"
+
+    @strawberry.field
+    def payload(self, size: int) -> str:
+        return "x" * size
+
+
+@strawberry.type
+class Subscription:
+    @strawberry.subscription
+    async def count(self, target: int = 3) -> AsyncGenerator[int, None]:
+        for i in range(target):
+            yield i
+
+    @strawberry.subscription
+    async def ticks(self) -> AsyncGenerator[int, None]:
+        i = 0
+        while True:
+            yield i
+            i += 1
+            await asyncio.sleep(0.01)
+
+    @strawberry.subscription
+    async def repeat(self, times: int) -> AsyncGenerator[str, None]:
+        # Poorly compressible on its own, but identical in every message.
+        value = "".join(hashlib.sha256(str(i).encode()).hexdigest() for i in range(16))
+        for _ in range(times):
+            yield value
+
+
+SCHEMA = strawberry.Schema(query=Query, subscription=Subscription)
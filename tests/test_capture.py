@@ -0,0 +1,264 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import tornado.web
+from tornado.testing import AsyncHTTPTestCase, gen_test
+from tornado.websocket import websocket_connect
+from strawberry.subscriptions import (
+    GRAPHQL_TRANSPORT_WS_PROTOCOL,
+    GRAPHQL_WS_PROTOCOL,
+)
+
+from strawberry_tornado.capture import (
+    REDACTED,
+    TrafficRecorder,
+    capture_files,
+    read_capture,
+    redact_keys,
+)
+from strawberry_tornado.handler import GraphQLHandler
+from strawberry_tornado.replay import replay
+from .schema import SCHEMA
+
+
+HELLO = "query Hello($name: String!, $secret: String!) { hello(name: $name, secret: $secret) }"
+COUNT = "subscription { count(target: 3) }"
+TICKS = "subscription { ticks }"
+
+
+def make_app(recorder=None) -> tornado.web.Application:
+    return tornado.web.Application([
+        (r"/graphql", GraphQLHandler, dict(schema=SCHEMA, traffic_recorder=recorder)),
+    ])
+
+
+class TempDirMixin:
+    def setUp(self) -> None:
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "capture.jsonl")
+        super().setUp()
+
+    def tearDown(self) -> None:
+        super().tearDown()
+        shutil.rmtree(self.tmp)
+
+
+class TestTrafficRecorder(TempDirMixin, unittest.TestCase):
+    def _record(self, recorder: TrafficRecorder, query: str, i: int) -> None:
+        recorder.record("http", query, "Op", {"i": i}, started=1000 + i, duration=0.001, response_size=10)
+
+    def test_query_written_once_per_file(self) -> None:
+        recorder = TrafficRecorder(self.path)
+        for i in range(3):
+            self._record(recorder, "{ a }", i)
+        recorder.close()
+        with open(self.path) as fh:
+            lines = [json.loads(line) for line in fh]
+        self.assertEqual(["query" in line for line in lines], [True, False, False])
+        self.assertEqual(len({line["hash"] for line in lines}), 1)
+
+    def test_rotation_keeps_files_self_contained(self) -> None:
+        recorder = TrafficRecorder(self.path, max_bytes=300, backup_count=2)
+        for i in range(20):
+            self._record(recorder, "{ a }", i)
+        recorder.close()
+        files = capture_files(self.path)
+        self.assertEqual(files, [f"{self.path}.2", f"{self.path}.1", self.path])
+        for path in files:
+            with open(path) as fh:
+                self.assertIn('"query":', fh.readline())
+        records = list(read_capture(files[-1:]))
+        self.assertTrue(records)
+        self.assertTrue(all(r["query"] == "{ a }" for r in records))
+        self.assertEqual(records[-1]["variables"], {"i": 19})
+
+    def test_redact_keys(self) -> None:
+        hook = redact_keys("password")
+        self.assertEqual(
+            hook({"Password": "a", "input": [{"password": "b", "name": "c"}]}),
+            {"Password": REDACTED, "input": [{"password": REDACTED, "name": "c"}]},
+        )
+        self.assertIsNone(hook(None))
+
+    def test_record_after_close_reopens_writer(self) -> None:
+        recorder = TrafficRecorder(self.path)
+        self._record(recorder, "{ a }", 0)
+        recorder.close()
+        self._record(recorder, "{ a }", 1)
+        recorder.close()
+        self.assertEqual([r["variables"]["i"] for r in read_capture(self.path)], [0, 1])
+
+    def test_write_failures_are_logged_and_recovered(self) -> None:
+        path = os.path.join(self.tmp, "missing", "capture.jsonl")
+        recorder = TrafficRecorder(path)
+        with self.assertLogs(level="WARNING") as logs:
+            for i in range(100):
+                self._record(recorder, "{ a }", i)
+            recorder.close()
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn("unable to write", logs.output[0])
+
+        os.mkdir(os.path.dirname(path))
+        self._record(recorder, "{ a }", 100)
+        recorder.close()
+        self.assertEqual([r["variables"]["i"] for r in read_capture(path)], [100])
+
+    def test_full_queue_drops_records(self) -> None:
+        release = threading.Event()
+
+        class BlockedRecorder(TrafficRecorder):
+            def _write(self, record) -> None:
+                release.wait()
+                super()._write(record)
+
+        recorder = BlockedRecorder(self.path, max_queued=2)
+        with self.assertLogs(level="WARNING") as logs:
+            for i in range(10):
+                self._record(recorder, "{ a }", i)
+        self.assertIn("queue is full", logs.output[0])
+        dropped = recorder._dropped
+        self.assertGreaterEqual(dropped, 7)
+        release.set()
+        recorder.close()
+        self.assertEqual(len(list(read_capture(self.path))), 10 - dropped)
+
+    def test_record_while_closing(self) -> None:
+        recorder = TrafficRecorder(self.path)
+
+        def produce(n: int) -> None:
+            for i in range(500):
+                self._record(recorder, "{ a }", n * 1000 + i)
+
+        producers = [threading.Thread(target=produce, args=(n,)) for n in range(4)]
+        for producer in producers:
+            producer.start()
+        while any(producer.is_alive() for producer in producers):
+            recorder.close()
+            writers = [t for t in threading.enumerate() if t.name == "strawberry-tornado-capture"]
+            self.assertLessEqual(len(writers), 1)
+        recorder.close()
+        values = sorted(r["variables"]["i"] for r in read_capture(self.path))
+        self.assertEqual(values, sorted(n * 1000 + i for n in range(4) for i in range(500)))
+
+
+class TestCaptureReplay(TempDirMixin, AsyncHTTPTestCase):
+    def get_app(self) -> tornado.web.Application:
+        self.recorder = TrafficRecorder(self.path)
+        return make_app(self.recorder)
+
+    def tearDown(self) -> None:
+        self.recorder.close()
+        super().tearDown()
+
+    async def _ws(self, subprotocol: str):
+        conn = await websocket_connect(self.get_url("/graphql").replace("http", "ws"), subprotocols=[subprotocol])
+        conn.write_message(json.dumps({"type": "connection_init"}))
+        while json.loads(await conn.read_message())["type"] != "connection_ack":
+            pass
+        return conn
+
+    async def _close(self, conn) -> None:
+        # Wait for the closing handshake, every message before it was handled by the server.
+        conn.close()
+        while await conn.read_message() is not None:
+            pass
+
+    async def _record_traffic(self) -> None:
+        response = await self.http_client.fetch(
+            self.get_url("/graphql"),
+            method="POST",
+            headers={"Content-Type": "application/json"},
+            body=json.dumps({"query": HELLO, "operationName": "Hello", "variables": {"name": "a", "secret": "s"}}),
+        )
+        self.assertEqual(json.loads(response.body), {"data": {"hello": "Hello a"}})
+
+        # Finite subscription completed by the server.
+        conn = await self._ws(GRAPHQL_TRANSPORT_WS_PROTOCOL)
+        conn.write_message(json.dumps({"id": "1", "type": "subscribe", "payload": {"query": COUNT}}))
+        while json.loads(await conn.read_message())["type"] != "complete":
+            pass
+        await self._close(conn)
+
+        # Endless subscription stopped by a legacy client.
+        conn = await self._ws(GRAPHQL_WS_PROTOCOL)
+        conn.write_message(json.dumps({"id": "1", "type": "start", "payload": {"query": TICKS}}))
+        for _ in range(3):
+            self.assertEqual(json.loads(await conn.read_message())["type"], "data")
+        conn.write_message(json.dumps({"id": "1", "type": "stop"}))
+        await self._close(conn)
+
+    @gen_test(timeout=20)
+    async def test_round_trip(self) -> None:
+        self.recorder.redact = redact_keys("secret")
+        await self._record_traffic()
+        self.recorder.close()
+
+        records = list(read_capture(self.path))
+        self.assertEqual([r["transport"] for r in records], ["http", "ws", "ws"])
+        http, count, ticks = records
+        self.assertEqual(http["operation_name"], "Hello")
+        self.assertEqual(http["variables"], {"name": "a", "secret": REDACTED})
+        self.assertEqual(http["response_size"], len(b'{"data": {"hello": "Hello a"}}'))
+        self.assertEqual((count["subprotocol"], count["ended"]), (GRAPHQL_TRANSPORT_WS_PROTOCOL, "server"))
+        self.assertEqual((ticks["subprotocol"], ticks["ended"]), (GRAPHQL_WS_PROTOCOL, "client"))
+        self.assertGreater(ticks["response_size"], 0)
+
+        results = await replay(make_app(), records, rate=10, timeout=5)
+        self.assertEqual([r.error for r in results], [None, None, None])
+        self.assertEqual(results[0].response_size, http["response_size"])
+        self.assertEqual(results[1].response_size, count["response_size"])
+        self.assertGreater(results[2].response_size, 0)
+
+    @gen_test(timeout=20)
+    async def test_failing_redact_hook_does_not_break_serving(self) -> None:
+        def redact(variables):
+            raise ValueError("broken hook")
+
+        self.recorder.redact = redact
+        with self.assertLogs(level="WARNING") as logs:
+            await self._record_traffic()
+        self.assertEqual(len(logs.records), 3)
+        self.assertTrue(all("broken hook" in line for line in logs.output))
+        self.recorder.close()
+        self.assertEqual(list(read_capture(self.path)), [])
+
+    @gen_test(timeout=20)
+    async def test_replay_reports_failures(self) -> None:
+        endless = {
+            "ts": 0, "transport": "ws", "hash": "h", "query": TICKS, "operation_name": None, "variables": None,
+            "duration": 0.1, "response_size": 0, "subprotocol": GRAPHQL_TRANSPORT_WS_PROTOCOL, "ended": "server",
+        }
+        missing = dict(endless, ts=0.001, transport="http", query=HELLO)
+        results = await replay(make_app(), [endless], rate=0, timeout=0.5)
+        self.assertEqual(results[0].error, "timeout")
+
+        results = await replay(make_app(), [endless, missing], rate=0, path="/missing", timeout=5)
+        self.assertIn("404", results[0].error)
+        self.assertEqual(results[1].error, "HTTP 404")
+
+    @gen_test(timeout=20)
+    async def test_replay_keeps_overlap_of_late_written_subscription(self) -> None:
+        # The subscription started first but was written after the queries which ran during it.
+        queries = [
+            {
+                "ts": 100 + offset, "transport": "http", "hash": "q", "query": HELLO, "operation_name": "Hello",
+                "variables": {"name": "a", "secret": "s"}, "duration": 0.001, "response_size": 30,
+            }
+            for offset in (0.1, 0.2, 0.3)
+        ]
+        subscription = {
+            "ts": 100.0, "transport": "ws", "hash": "t", "query": TICKS, "operation_name": None, "variables": None,
+            "duration": 0.5, "response_size": 0, "subprotocol": GRAPHQL_TRANSPORT_WS_PROTOCOL, "ended": "client",
+        }
+        results = await replay(make_app(), queries + [subscription], rate=1, timeout=5)
+        self.assertEqual([r.transport for r in results], ["ws", "http", "http", "http"])
+        self.assertEqual([r.error for r in results], [None] * 4)
+        ws, *http = results
+        self.assertLess(ws.started, 0.05)
+        for result, expected in zip(http, (0.1, 0.2, 0.3)):
+            self.assertAlmostEqual(result.started, expected, delta=0.05)
+        self.assertGreater(ws.started + ws.duration, http[-1].started)
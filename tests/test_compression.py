@@ -0,0 +1,198 @@
+import gzip
+import json
+import struct
+import unittest
+from unittest import mock
+from typing import Any, List, Optional
+
+import tornado.web
+from tornado.httpclient import HTTPResponse
+from tornado.tcpclient import TCPClient
+from tornado.testing import AsyncHTTPTestCase, gen_test
+from tornado.websocket import WebSocketClientConnection, websocket_connect
+from strawberry.subscriptions import GRAPHQL_TRANSPORT_WS_PROTOCOL
+
+from strawberry_tornado import compression
+from strawberry_tornado.compression import HTTPCompression, NoContextTakeoverProtocol, WebSocketCompression
+from strawberry_tornado.handler import GraphQLHandler
+from .schema import SCHEMA
+
+
+class TestHTTPCompression(unittest.TestCase):
+    def test_cache_reuses_compressed_bytes(self) -> None:
+        http = HTTPCompression(cache_max_bytes=1024)
+        data = b'{"data": 1}' * 100
+        compressed = http.compress(data, "gzip")
+        self.assertEqual(gzip.decompress(compressed), data)
+        self.assertIs(http.compress(bytes(data), "gzip"), compressed)
+        self.assertIsNot(http.compress(data + b" ", "gzip"), compressed)
+
+    def test_cache_is_bounded_by_bytes(self) -> None:
+        http = HTTPCompression(cache_max_bytes=100)
+        for i in range(20):
+            http.compress(bytes([i]) * 1000, "gzip")
+        self.assertLessEqual(http._cache_bytes, 100)
+        self.assertEqual(http._cache_bytes, sum(len(v) for v in http._cache.values()))
+        self.assertTrue(all(len(key[1]) == 16 for key in http._cache))
+
+    def test_cache_skips_payloads_larger_than_limit(self) -> None:
+        http = HTTPCompression(cache_max_bytes=10)
+        http.compress(b"x" * 1000, "gzip")
+        self.assertEqual((len(http._cache), http._cache_bytes), (0, 0))
+
+    def test_select_encoding(self) -> None:
+        http = HTTPCompression()
+        self.assertEqual(http.select_encoding("gzip, deflate"), "gzip")
+        self.assertIsNone(http.select_encoding("gzip;q=0"))
+        self.assertIsNone(http.select_encoding("identity"))
+        expected = "br" if compression.brotli is not None else "gzip"
+        self.assertEqual(http.select_encoding("gzip, br"), expected)
+        self.assertEqual(http.select_encoding("br;q=0, gzip"), "gzip")
+
+
+class TestAppWideGzip(AsyncHTTPTestCase):
+    def get_app(self) -> tornado.web.Application:
+        http = HTTPCompression(min_size=4096)
+        return tornado.web.Application([
+            (r"/graphql", GraphQLHandler, dict(schema=SCHEMA, http_compression=http)),
+        ], compress_response=True)
+
+    @gen_test
+    async def test_vary_is_not_duplicated(self) -> None:
+        for size in (10, 2000, 5000):
+            response = await self.http_client.fetch(
+                self.get_url("/graphql"),
+                method="POST",
+                headers={"Content-Type": "application/json", "Accept-Encoding": "gzip"},
+                body=json.dumps({"query": "query Payload($size: Int!) { payload(size: $size) }", "variables": {"size": size}}),
+                decompress_response=False,
+            )
+            self.assertEqual(response.headers.get_list("Vary"), ["Accept-Encoding"], size)
+            # Tornado compresses results below min_size from its own threshold.
+            self.assertEqual(response.headers.get("Content-Encoding"), None if size < 1024 else "gzip", size)
+
+
+class ExtensionsHandler(GraphQLHandler):
+    offers: List[Optional[str]] = []
+
+    async def get_context(self) -> Any:
+        self.offers.append(self.request.headers.get("Sec-WebSocket-Extensions"))
+        return None
+
+
+class TestHandlerCompression(AsyncHTTPTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        ExtensionsHandler.offers = []
+
+    def get_app(self) -> tornado.web.Application:
+        http = HTTPCompression(min_size=100)
+        return tornado.web.Application([
+            (r"/graphql", GraphQLHandler, dict(schema=SCHEMA, http_compression=http)),
+            (r"/takeover", ExtensionsHandler, dict(schema=SCHEMA, ws_compression=WebSocketCompression())),
+            (r"/no-takeover", ExtensionsHandler, dict(schema=SCHEMA, ws_compression=WebSocketCompression(context_takeover=False))),
+        ])
+
+    async def _query(self, size: int, accept_encoding: str) -> HTTPResponse:
+        return await self.http_client.fetch(
+            self.get_url("/graphql"),
+            method="POST",
+            headers={"Content-Type": "application/json", "Accept-Encoding": accept_encoding},
+            body=json.dumps({"query": "query Payload($size: Int!) { payload(size: $size) }", "variables": {"size": size}}),
+            decompress_response=False,
+        )
+
+    async def _subscribe(self, path: str) -> WebSocketClientConnection:
+        conn = await websocket_connect(self.get_url(path).replace("http", "ws"), subprotocols=[GRAPHQL_TRANSPORT_WS_PROTOCOL], compression_options={})
+        conn.write_message(json.dumps({"type": "connection_init"}))
+        self.assertEqual(json.loads(await conn.read_message())["type"], "connection_ack")
+        conn.write_message(json.dumps({"id": "1", "type": "subscribe", "payload": {"query": "subscription { count(target: 1) }"}}))
+        self.assertEqual(json.loads(await conn.read_message()), {"id": "1", "type": "next", "payload": {"data": {"count": 0}}})
+        return conn
+
+    async def _frame_sizes(self, path: str, times: int) -> List[int]:
+        """Payload sizes of the `next` frames, as sent on the wire"""
+        stream = await TCPClient().connect("127.0.0.1", self.get_http_port())
+        await stream.write((
+            f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            "Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\nSec-WebSocket-Version: 13\r\n"
+            f"Sec-WebSocket-Protocol: {GRAPHQL_TRANSPORT_WS_PROTOCOL}\r\n"
+            "Sec-WebSocket-Extensions: permessage-deflate\r\n\r\n"
+        ).encode())
+        self.assertIn(b" 101 ", await stream.read_until(b"\r\n\r\n"))
+        query = f"subscription {{ repeat(times: {times}) }}"
+        for message in ({"type": "connection_init"}, {"id": "1", "type": "subscribe", "payload": {"query": query}}):
+            payload = json.dumps(message).encode()
+            # Client frames are masked, an all zero mask leaves the payload as is.
+            await stream.write(struct.pack("!BB", 0x81, 0x80 | len(payload)) + bytes(4) + payload)
+        sizes = []
+        for _ in range(times + 2):  # connection_ack, next * times, complete
+            head = await stream.read_bytes(2)
+            self.assertTrue(head[0] & 0x40, "frame is not compressed")
+            length = head[1] & 0x7F
+            if length == 126:
+                length = struct.unpack("!H", await stream.read_bytes(2))[0]
+            await stream.read_bytes(length)
+            sizes.append(length)
+        stream.close()
+        return sizes[1:-1]
+
+    @gen_test
+    async def test_small_result_is_not_compressed(self) -> None:
+        response = await self._query(10, "gzip, br")
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertEqual(json.loads(response.body), {"data": {"payload": "x" * 10}})
+        self.assertEqual(response.headers["Vary"], "Accept-Encoding")
+
+    @gen_test
+    async def test_gzip(self) -> None:
+        response = await self._query(1000, "gzip")
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(response.body)), {"data": {"payload": "x" * 1000}})
+
+    @unittest.skipIf(compression.brotli is None, "brotli is not installed")
+    @gen_test
+    async def test_brotli_preferred(self) -> None:
+        response = await self._query(1000, "gzip, br")
+        self.assertEqual(response.headers["Content-Encoding"], "br")
+        self.assertEqual(json.loads(compression.brotli.decompress(response.body)), {"data": {"payload": "x" * 1000}})
+
+    @gen_test
+    async def test_refused_encodings(self) -> None:
+        for accept_encoding in ("gzip;q=0", "br;q=0, gzip;q=0", "identity", ""):
+            response = await self._query(1000, accept_encoding)
+            self.assertNotIn("Content-Encoding", response.headers, accept_encoding)
+            self.assertEqual(json.loads(response.body), {"data": {"payload": "x" * 1000}})
+
+    @gen_test
+    async def test_context_takeover_negotiation(self) -> None:
+        conn = await self._subscribe("/takeover")
+        self.assertEqual(conn.headers["Sec-WebSocket-Extensions"], "permessage-deflate")
+        conn.close()
+
+        conn = await self._subscribe("/no-takeover")
+        self.assertEqual(
+            conn.headers["Sec-WebSocket-Extensions"],
+            "permessage-deflate; server_no_context_takeover",
+        )
+        conn.close()
+        # The request headers are not modified.
+        self.assertEqual(ExtensionsHandler.offers, ["permessage-deflate; client_max_window_bits"] * 2)
+
+    @gen_test
+    async def test_context_takeover_frame_sizes(self) -> None:
+        # With context takeover a repeated payload is a back reference to the previous message.
+        first, *repeated = await self._frame_sizes("/takeover", 3)
+        self.assertTrue(all(size < first / 4 for size in repeated), (first, repeated))
+
+        sizes = await self._frame_sizes("/no-takeover", 3)
+        self.assertEqual(len(set(sizes)), 1, sizes)
+
+    @gen_test
+    async def test_context_takeover_kept_with_warning_without_hook(self) -> None:
+        with mock.patch.object(NoContextTakeoverProtocol, "supported", return_value=False):
+            with self.assertLogs(level="WARNING") as logs:
+                conn = await self._subscribe("/no-takeover")
+        self.assertEqual(conn.headers["Sec-WebSocket-Extensions"], "permessage-deflate")
+        self.assertIn("context_takeover=False is not applied", logs.output[0])
+        conn.close()